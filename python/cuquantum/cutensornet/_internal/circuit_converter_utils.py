@@ -155,7 +155,7 @@ def parse_gates_to_mode_labels_operands(
     Populate the indices for all gate tensors
 
     Args:
-        gates: An list of gate tensors and the corresponding qubits.
+        gates: A sequence of (gate tensor, gate qubits) pairs.
         qubits_frontier: The map of the qubits to its current frontier index.
         next_frontier: The next index to use. 
 
@@ -2,26 +2,123 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+from collections import deque
+import functools
 from types import MappingProxyType
 
 from cirq import protocols, unitary, Circuit, MeasurementGate, Moment
+from cirq import CNOT, CZ, H, S, SWAP, T, X, Y, Z
 import cupy as cp
+import numpy as np
 
-from .tensor_wrapper import _get_backend_asarray_func
+from .tensor_wrapper import _get_backend_asarray_func, torch
+
+# Unitaries of the most common constant gates, computed once at import time
+_CONSTANT_GATE_UNITARIES = MappingProxyType({gate: unitary(gate) for gate in (H, X, Y, Z, S, T, CZ, CNOT, SWAP)})
+
+# Host unitaries keyed on gate, independent of dtype and backend. Only these host matrices are reused,
+# every unfold_circuit call transfers them into new tensors owned by the caller.
+_GATE_UNITARY_CACHE = dict()
+_GATE_UNITARY_CACHE_MAXSIZE = 4096
+
+# maximal alignment (in bytes) of the operand data pointers inspected by cuTensorNet
+_GATE_ALIGNMENT = 256
+
+# tensor shapes for gates acting on a small number of qubits
+_GATE_SHAPES = {n_gate_qubits: (2,) * 2 * n_gate_qubits for n_gate_qubits in range(1, 8)}
+
+@functools.lru_cache(maxsize=128)
+def _get_qubits_metadata(all_qubits):
+    """
+    Given the frozenset of all qubits in a circuit, return the qubits sorted in ascending order and
+    a map from each qubit to its bit in the bitmask used for lightcone construction.
+    """
+    qubits = tuple(sorted(all_qubits))
+    qubit_to_bit = MappingProxyType({q: 1 << i for i, q in enumerate(qubits)})
+    return qubits, qubit_to_bit
+
+def _get_gate_unitary(operation):
+    """
+    Return the unitary of an operation, reusing the matrix computed for an equal gate if available.
+    """
+    gate = operation.gate
+    try:
+        matrix = _CONSTANT_GATE_UNITARIES.get(gate)
+        if matrix is not None:
+            return matrix
+        matrix = _GATE_UNITARY_CACHE.get(gate)
+    except TypeError:
+        # unhashable gate
+        return unitary(operation)
+    if matrix is None:
+        matrix = unitary(operation)
+        if gate is not None:
+            if len(_GATE_UNITARY_CACHE) >= _GATE_UNITARY_CACHE_MAXSIZE:
+                _GATE_UNITARY_CACHE.clear()
+            _GATE_UNITARY_CACHE[gate] = matrix
+    return matrix
+
+def _get_itemsize(dtype, backend):
+    """
+    Return the size in bytes of an element of the given data type for the backend.
+    """
+    if backend is torch:
+        return torch.tensor([], dtype=dtype).element_size()
+    return np.dtype(dtype).itemsize
+
+def _aligned_zeros(shape, dtype):
+    """
+    Return a zero-initialized NumPy array whose data pointer is aligned to :data:`_GATE_ALIGNMENT`.
+    """
+    size = int(np.prod(shape))
+    itemsize = np.dtype(dtype).itemsize
+    buffer = np.zeros(size + _GATE_ALIGNMENT // itemsize, dtype=dtype)
+    offset = (-buffer.ctypes.data % _GATE_ALIGNMENT) // itemsize
+    return buffer[offset:offset+size].reshape(shape)
+
+def _create_gate_tensors(batches, dtype, backend):
+    """
+    Create the gate tensors for each group of operations with the same number of qubits.
+
+    All unitaries within a group are stacked on the host so that only a single transfer is needed per group.
+    The transfers use the regular ``asarray`` of the backend rather than asynchronous copies from pinned memory, since
+    the host stack is a temporary and the tensors may be consumed on another stream than the current one
+    (e.g. the one passed to :func:`cuquantum.contract`).
+    Each gate occupies a row of the stack padded to a multiple of :data:`_GATE_ALIGNMENT` bytes, so that all
+    gate tensors share the (maximal) alignment of the stack regardless of their position in the batch.
+    Returns a dictionary that maps the number of qubits to the list of gate tensors.
+    """
+    asarray = _get_backend_asarray_func(backend)
+    itemsize = _get_itemsize(dtype, backend)
+    # only NumPy operands stay on the host, for the other backends the host buffer is converted on transfer
+    host_dtype = np.complex128 if backend is torch else np.dtype(dtype)
+    tensors = dict()
+    for n_gate_qubits, operations in batches.items():
+        n_elements = 4 ** n_gate_qubits
+        stride = -(-n_elements * itemsize // _GATE_ALIGNMENT) * _GATE_ALIGNMENT // itemsize
+        matrices = _aligned_zeros((len(operations), stride), host_dtype)
+        for row, operation in zip(matrices, operations):
+            row[:n_elements] = _get_gate_unitary(operation).reshape(-1)
+        stack = asarray(matrices, dtype=dtype)
+        gate_shape = _GATE_SHAPES.get(n_gate_qubits) or (2,) * 2 * n_gate_qubits
+        tensors[n_gate_qubits] = [stack[ix, :n_elements].reshape(gate_shape) for ix in range(len(operations))]
+    return tensors
 
 def remove_measurements(circuit):
     """
-    Return a circuit with final measurement operations removed
+    Return a snapshot of the circuit with final measurement operations removed.
+    The snapshot is frozen when supported by cirq, so later modifications of the input circuit do not affect it
     """
-    circuit = circuit.copy()
     if circuit.has_measurements():
         if not circuit.are_all_measurements_terminal():
             raise ValueError('mid-circuit measurement not supported in tensor network simulation')
-        else:
-            predicate = lambda operation: isinstance(operation.gate, MeasurementGate)
-            measurement_gates = list(circuit.findall_operations(predicate))
-            circuit.batch_remove(measurement_gates)
-    return circuit
+        circuit = circuit.copy()
+        predicate = lambda operation: isinstance(operation.gate, MeasurementGate)
+        measurement_gates = list(circuit.findall_operations(predicate))
+        circuit.batch_remove(measurement_gates)
+        return circuit.freeze() if hasattr(circuit, 'freeze') else circuit
+    # cirq.FrozenCircuit is only available for cirq>=0.10
+    return circuit.freeze() if hasattr(circuit, 'freeze') else circuit.copy()
 
 def get_inverse_circuit(circuit):
     """
@@ -39,17 +136,19 @@ def unfold_circuit(circuit, dtype='complex128', backend=cp):
         backend: The package the tensor operands belong to.
 
     Returns:
-        All qubits and gate operations from the input circuit
+        All qubits and a list of (gate tensor, gate qubits) pairs from the input circuit
     """
-    qubits = sorted(circuit.all_qubits())
-    asarray = _get_backend_asarray_func(backend)
-    gates = []
+    qubits, _ = _get_qubits_metadata(circuit.all_qubits())
+    qubits = list(qubits)
+    # fresh tensors are created for every call so that the operands of different converters never share memory
+    batches = dict()    # gate arity -> operations whose tensors are to be created
+    gate_qubits = []
     for moment in circuit.moments:
         for operation in moment:
-            gate_qubits = operation.qubits
-            tensor = unitary(operation).reshape((2,) * 2 * len(gate_qubits))
-            tensor = asarray(tensor, dtype=dtype)
-            gates.append([tensor, operation.qubits])
+            batches.setdefault(len(operation.qubits), []).append(operation)
+            gate_qubits.append(operation.qubits)
+    tensors = {n_gate_qubits: iter(batch) for n_gate_qubits, batch in _create_gate_tensors(batches, dtype, backend).items()}
+    gates = [(next(tensors[len(q)]), q) for q in gate_qubits]
     return qubits, gates
 
 def get_lightcone_circuit(circuit, coned_qubits):
@@ -63,26 +162,35 @@ def get_lightcone_circuit(circuit, coned_qubits):
     Returns:
         A :class:`cirq.Circuit` object that potentially contains less number of gates
     """
-    coned_qubits = set(coned_qubits)
-    n_qubits = len(circuit.all_qubits())
-    moments = []
-    reversed_moments = circuit.moments[::-1]
-    n_moments = len(reversed_moments)
-    for ix, moment in enumerate(reversed_moments):
-        if len(coned_qubits) == n_qubits:
-            moments.extend(reversed_moments[ix:])
+    # track the coned qubits as a bitmask so that set intersection/union become integer operations
+    _, qubit_to_bit = _get_qubits_metadata(circuit.all_qubits())
+    all_mask = (1 << len(qubit_to_bit)) - 1
+    coned_mask = 0
+    for q in coned_qubits:
+        coned_mask |= qubit_to_bit[q]
+    # moments are visited backwards and prepended, so they end up in circuit order
+    moments = deque()
+    n_moments = len(circuit.moments)
+    for ix, moment in enumerate(reversed(circuit.moments)):
+        if coned_mask == all_mask:
+            moments.extendleft(reversed(circuit.moments[:n_moments-ix]))
             break
+        # operations within a moment act on disjoint qubits, so the order they are visited in does not matter
         reduced_moment = []
-        reversed_operations = moment.operations[::-1]
-        n_operations = len(reversed_operations)
-        for iy, operation in enumerate(reversed_operations):
-            if len(coned_qubits) == n_qubits:
-                reduced_moment.extend(reversed_operations[iy:])
-                break
-            qubit_set = set(operation.qubits)
-            if qubit_set & coned_qubits:
+        for operation in moment:
+            gate_qubits = operation.qubits
+            # fast paths for the most common one- and two-qubit gates
+            if len(gate_qubits) == 1:
+                op_mask = qubit_to_bit[gate_qubits[0]]
+            elif len(gate_qubits) == 2:
+                op_mask = qubit_to_bit[gate_qubits[0]] | qubit_to_bit[gate_qubits[1]]
+            else:
+                op_mask = 0
+                for q in gate_qubits:
+                    op_mask |= qubit_to_bit[q]
+            if op_mask & coned_mask:
                 reduced_moment.append(operation)
-                coned_qubits |= qubit_set
-        moments.append(Moment(reduced_moment[::-1]))
-    newqc = Circuit(moments[::-1])
+                coned_mask |= op_mask
+        moments.appendleft(Moment(reduced_moment))
+    newqc = Circuit(moments)
     return newqc
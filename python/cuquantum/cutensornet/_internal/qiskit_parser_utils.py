@@ -38,7 +38,7 @@ def unfold_circuit(circuit, dtype='complex128', qubit_map=None, gates=None, back
         backend: The package the tensor operands belong to.
 
     Returns:
-        All qubits and gate operations from the input circuit
+        All qubits and a list of (gate tensor, gate qubits) pairs from the input circuit
     """
     if gates is None:
         gates = []
@@ -54,7 +54,7 @@ def unfold_circuit(circuit, dtype='complex128', qubit_map=None, gates=None, back
                 if isinstance(operation, ControlledGate):
                     # in qiskit notation, qubit at high index is the target qubit
                     gate_qubits = gate_qubits[::-1]
-                gates.append([tensor, gate_qubits])
+                gates.append((tensor, tuple(gate_qubits)))
                 continue
         else:
             if isinstance(operation, (Barrier, Delay)):
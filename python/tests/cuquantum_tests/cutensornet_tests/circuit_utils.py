@@ -2,6 +2,7 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import functools
 from types import MappingProxyType
 
 try:
@@ -38,26 +39,46 @@ qiskit_circuits = []
 EMPTY_DICT = MappingProxyType(dict())
 
 
+@functools.lru_cache(maxsize=64)
 def gen_qubits_map(qubits):
     n_qubits = len(qubits)
     if n_qubits > len(EINSUM_SYMBOLS_BASE):
         raise NotImplementedError(f'test suite only supports up to {len(EINSUM_SYMBOLS_BASE)} qubits')
-    qubits_map = dict(zip(qubits, EINSUM_SYMBOLS_BASE[:n_qubits]))
+    # read-only as the same mapping is returned to every caller
+    qubits_map = MappingProxyType(dict(zip(qubits, EINSUM_SYMBOLS_BASE[:n_qubits])))
     return qubits_map
 
 
+@functools.lru_cache(maxsize=1024)
+def gen_rdm_expression(qubits, where):
+    qubits_map = gen_qubits_map(qubits)
+    output_inds = ''.join([qubits_map[q] for q in where])
+    output_inds += output_inds.upper()
+    left_inds = ''.join([qubits_map[q] for q in qubits])
+    right_inds = ''.join([qubits_map[q].upper() if q in where else qubits_map[q] for q in qubits])
+    return left_inds + ',' + right_inds + '->' + output_inds
+
+
+def gen_random_bits(shape):
+    # ASCII codes of '0'/'1' so that each row can be decoded into a bitstring directly
+    return np.random.randint(ord('0'), ord('1')+1, size=shape, dtype=np.uint8)
+
+
 def bitstring_generator(n_qubits, nsample=1):
-    for _ in range(nsample):
-        bitstring = ''.join(np.random.choice(('0', '1'), n_qubits))
+    bits = gen_random_bits((nsample, n_qubits))
+    for ix in range(nsample):
+        bitstring = bits[ix].tobytes().decode()
         yield bitstring
 
 
 def where_fixed_generator(qubits, nfix_max, nsite_max=None):
-    indices = np.arange(len(qubits))
+    # one random permutation of the qubits for each number of fixed qubits
+    permutations = np.argsort(np.random.rand(nfix_max, len(qubits)), axis=1)
+    bits = gen_random_bits((nfix_max, nfix_max))
     for nfix in range(nfix_max):
-        np.random.shuffle(indices)
+        indices = permutations[nfix]
         fixed_sites = [qubits[indices[ix]] for ix in range(nfix)]
-        bitstring = ''.join(np.random.choice(('0', '1'), nfix))
+        bitstring = bits[nfix, :nfix].tobytes().decode()
         fixed = dict(zip(fixed_sites, bitstring))
         if nsite_max is None:
             yield fixed
@@ -67,14 +88,15 @@ def where_fixed_generator(qubits, nfix_max, nsite_max=None):
                 yield where, fixed
 
 
-def get_partial_indices(qubits, fixed):
-    partial_indices = [slice(None)] * len(qubits)
-    index_map = {'0': slice(0, 1),
-                 '1': slice(1, 2)}
-    for ix, q in enumerate(qubits):
-        if q in fixed:
-            partial_indices[ix] = index_map[fixed[q]]
-    return partial_indices
+PARTIAL_INDEX_MAP = MappingProxyType({'0': slice(0, 1),
+                                       '1': slice(1, 2)})
+
+
+def get_partial_indices(qubit_axes, fixed):
+    partial_indices = [slice(None)] * len(qubit_axes)
+    for q, bit in fixed.items():
+        partial_indices[qubit_axes[q]] = PARTIAL_INDEX_MAP[bit]
+    return tuple(partial_indices)
 
 
 ################################################
@@ -177,24 +199,29 @@ if qiskit:
 ###################################################################
 
 class BaseTester:
+    __slots__ = ('circuit', 'converter', 'backend', 'qubits', 'n_qubits', 'qubit_axes', 'dtype',
+                 'sv', '_sv_conj', 'nsample', 'nsite_max', 'nfix_max')
+
     def __init__(self, circuit, dtype, backend, nsample, nsite_max, nfix_max):
         self.circuit = circuit
         self.converter = CircuitToEinsum(circuit, dtype=dtype, backend=backend)
         self.backend = backend
         self.qubits = self.converter.qubits
         self.n_qubits = self.converter.n_qubits
+        self.qubit_axes = dict(zip(self.qubits, range(self.n_qubits)))
         self.dtype = dtype
         self.sv = None
+        self._sv_conj = None
         self.nsample = nsample
         self.nsite_max = max(1, min(nsite_max, self.n_qubits-1))
         self.nfix_max = max(min(nfix_max, self.n_qubits-nsite_max-1), 0)
-        
+
     def get_state_vector_from_simulator(self, fixed=EMPTY_DICT):
         if self.sv is None:
             self.sv = self._get_state_vector_from_simulator()
         if fixed:
-            partial_indices = get_partial_indices(self.qubits, fixed)
-            sv = self.sv[tuple(partial_indices)]
+            partial_indices = get_partial_indices(self.qubit_axes, fixed)
+            sv = self.sv[partial_indices]
             return sv.reshape((2,)*(self.n_qubits-len(fixed)))
         else:
             return self.sv
@@ -210,28 +237,36 @@ class BaseTester:
         :math: `rho_{a,b,a^{\prime},b^{\prime}}  = \sum_{c,d,e,...} SV^{\star}_{a^{\prime}, b^{\prime}, c, d, e, ...} SV_{a, b, c, d, e, ...}`
         """
         sv = self.get_state_vector_from_simulator()
-        partial_indices = get_partial_indices(self.qubits, fixed)
-        sv = sv[tuple(partial_indices)]
+        if self._sv_conj is None:
+            # conjugated once for all reduced density matrices; for torch this is a lazy view
+            self._sv_conj = sv.conj()
+        sv_conj = self._sv_conj
+        if fixed:
+            # slicing commutes with conjugation
+            partial_indices = get_partial_indices(self.qubit_axes, fixed)
+            sv = sv[partial_indices]
+            sv_conj = sv_conj[partial_indices]
         
-        qubits_map = gen_qubits_map(self.qubits)
-        output_inds = ''.join([qubits_map[q] for q in where])
-        output_inds += output_inds.upper()
-        left_inds = ''.join([qubits_map[q] for q in self.qubits])
-        right_inds = ''
-        for q in self.qubits:
-            if q in where:
-                right_inds += qubits_map[q].upper()
-            else:
-                right_inds += qubits_map[q]
-        expression = left_inds + ',' + right_inds + '->' + output_inds
+        expression = gen_rdm_expression(tuple(self.qubits), tuple(where))
         if self.backend is torch:
-            rdm = contract(expression, sv, sv.conj().resolve_conj())
+            # torch.einsum honors the conjugate bit of the lazy view, so the conjugated
+            # state vector does not need to be materialized as required by contract
+            rdm = torch.einsum(expression, sv, sv_conj)
         else:
-            rdm = contract(expression, sv, sv.conj())
+            rdm = contract(expression, sv, sv_conj)
         return rdm
         
     def _get_state_vector_from_simulator(self):
         raise NotImplementedError
+
+    def _transfer_state_vector(self, statevector):
+        # the simulators already return the requested precision, in which case no dtype conversion is requested
+        dtype = None if statevector.dtype == np.dtype(self.dtype) else self.dtype
+        if self.backend is torch:
+            dtype = None if dtype is None else getattr(torch, dtype)
+            return torch.from_numpy(statevector).to(device='cuda', dtype=dtype)
+        else:
+            return self.backend.asarray(statevector, dtype=dtype)
                 
     def test_state_vector(self):
         for fixed in where_fixed_generator(self.qubits, self.nfix_max):
@@ -270,19 +305,21 @@ class BaseTester:
 
 
 class CirqTester(BaseTester):
+    __slots__ = ()
+
     def _get_state_vector_from_simulator(self):
         qubits = self.qubits
         simulator = cirq.Simulator(dtype=self.dtype)
         result = simulator.simulate(self.circuit, qubit_order=qubits)
-        statevector = result.state_vector().reshape((2,)*self.n_qubits)
-        if self.backend is torch:
-            statevector = torch.as_tensor(statevector, dtype=getattr(torch, self.dtype), device='cuda')
-        else:
-            statevector = self.backend.asarray(statevector, dtype=self.dtype)
-        return statevector
+        statevector = result.state_vector()
+        # transfer the flat state vector as is and only reshape it on the target device
+        statevector = self._transfer_state_vector(statevector)
+        return statevector.reshape((2,)*self.n_qubits)
+
 
+class QiskitTester(BaseTester):
+    __slots__ = ()
 
-class QiskitTester(BaseTester):    
     def _get_state_vector_from_simulator(self):
         # requires qiskit >= 0.24.0
         precision = {'complex64': 'single',
@@ -302,8 +339,4 @@ class QiskitTester(BaseTester):
         # statevector returned by qiskit's simulator is labelled by the inverse of :attr:`qiskit.QuantumCircuit.qubits`
         # this is different from `cirq` and different from the implementation in :class:`CircuitToEinsum`
         sv = sv.transpose(list(range(circuit.num_qubits))[::-1])
-        if self.backend is torch:
-            sv = torch.as_tensor(sv, dtype=getattr(torch, self.dtype), device='cuda')
-        else:
-            sv = self.backend.asarray(sv, dtype=self.dtype)
-        return sv
+        return self._transfer_state_vector(sv)
@@ -0,0 +1,134 @@
+# Copyright (c) 2021-2022, NVIDIA CORPORATION & AFFILIATES
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import cupy as cp
+import numpy as np
+import pytest
+try:
+    import torch
+except ImportError:
+    torch = None
+try:
+    import cirq
+    from cuquantum.cutensornet._internal import cirq_parser_utils
+except ImportError:
+    cirq = cirq_parser_utils = None
+
+from cuquantum.cutensornet._internal import tensor_wrapper
+
+from .circuit_utils import backends, cirq_circuits
+
+
+def get_gate_tensors(circuit, dtype, backend):
+    _, gates = cirq_parser_utils.unfold_circuit(circuit, dtype=getattr(backend, dtype), backend=backend)
+    return [tensor for tensor, _ in gates]
+
+
+def to_numpy(tensor):
+    if isinstance(tensor, np.ndarray):
+        return tensor
+    elif torch is not None and isinstance(tensor, torch.Tensor):
+        return tensor.cpu().numpy()
+    else:
+        return cp.asnumpy(tensor)
+
+
+def check_gate_tensors(circuit, tensors):
+    operations = [operation for moment in circuit for operation in moment]
+    assert len(operations) == len(tensors)
+    for operation, tensor in zip(operations, tensors):
+        n = 2 ** len(operation.qubits)
+        assert np.allclose(to_numpy(tensor).reshape(n, n), cirq.unitary(operation), atol=1e-6)
+
+
+@pytest.fixture
+def empty_gate_caches():
+    cirq_parser_utils._GATE_UNITARY_CACHE.clear()
+    yield
+    cirq_parser_utils._GATE_UNITARY_CACHE.clear()
+
+
+@pytest.mark.skipif(cirq is None, reason="cirq is not installed")
+@pytest.mark.usefixtures("empty_gate_caches")
+class TestCirqGateUnitaryCache:
+
+    @pytest.mark.parametrize("circuit", cirq_circuits)
+    def test_reused_across_dtypes_and_backends(self, circuit, monkeypatch):
+        get_gate_tensors(circuit, 'complex128', backends[0])
+        n_cached = len(cirq_parser_utils._GATE_UNITARY_CACHE)
+        # all unitaries are available on the host from now on
+        monkeypatch.setattr(cirq_parser_utils, 'unitary', None)
+        for backend in backends:
+            for dtype in ('complex64', 'complex128'):
+                check_gate_tensors(circuit, get_gate_tensors(circuit, dtype, backend))
+        assert len(cirq_parser_utils._GATE_UNITARY_CACHE) == n_cached
+
+    def test_constant_gates_not_cached(self):
+        qubits = cirq.LineQubit.range(2)
+        circuit = cirq.Circuit([cirq.H(qubits[0]), cirq.T(qubits[1]), cirq.CNOT(*qubits), cirq.rx(0.3)(qubits[0])])
+        check_gate_tensors(circuit, get_gate_tensors(circuit, 'complex128', np))
+        assert list(cirq_parser_utils._GATE_UNITARY_CACHE) == [cirq.rx(0.3)]
+
+    @pytest.mark.parametrize("backend", backends)
+    def test_cleared_when_full(self, backend, monkeypatch):
+        monkeypatch.setattr(cirq_parser_utils, '_GATE_UNITARY_CACHE_MAXSIZE', 2)
+        qubit = cirq.LineQubit(0)
+        circuit = cirq.Circuit([cirq.rx(0.1)(qubit), cirq.ry(0.2)(qubit), cirq.rz(0.3)(qubit)])
+        check_gate_tensors(circuit, get_gate_tensors(circuit, 'complex128', backend))
+        assert list(cirq_parser_utils._GATE_UNITARY_CACHE) == [cirq.rz(0.3)]
+
+
+@pytest.mark.skipif(cirq is None, reason="cirq is not installed")
+@pytest.mark.usefixtures("empty_gate_caches")
+class TestCirqGateTensorOwnership:
+
+    @pytest.mark.parametrize("backend", backends)
+    def test_in_place_update_is_local(self, backend):
+        qubits = cirq.LineQubit.range(2)
+        circuit = cirq.Circuit([cirq.H(qubits[0]), cirq.H(qubits[1]), cirq.rx(0.3)(qubits[0]), cirq.rx(0.3)(qubits[1])])
+        tensors1 = get_gate_tensors(circuit, 'complex128', backend)
+        tensors2 = get_gate_tensors(circuit, 'complex128', backend)
+        # e.g. a parameter sweep updating the gate operands of one network in place
+        for tensor in tensors1[::2]:
+            tensor[...] = 0
+        operations = list(circuit.all_operations())
+        for ix in (1, 3):
+            assert np.allclose(to_numpy(tensors1[ix]).reshape(2, 2), cirq.unitary(operations[ix]))
+        check_gate_tensors(circuit, tensors2)
+        check_gate_tensors(circuit, get_gate_tensors(circuit, 'complex128', backend))
+
+
+@pytest.mark.skipif(cirq is None, reason="cirq is not installed")
+@pytest.mark.usefixtures("empty_gate_caches")
+class TestCirqGateTensorAlignment:
+
+    @pytest.mark.parametrize("dtype", ('complex64', 'complex128'))
+    @pytest.mark.parametrize("backend", backends)
+    def test_independent_of_batch_position(self, dtype, backend):
+        # alignments must not depend on the parameters, otherwise Network.reset_operands would fail
+        qubits = cirq.LineQubit.range(3)
+        for angle in (0.1, 0.2):
+            circuit = cirq.Circuit([cirq.rz(angle)(qubits[0]), cirq.ry(angle)(qubits[1]), cirq.rx(angle)(qubits[2]),
+                                    cirq.ry(2*angle)(qubits[0]), cirq.rz(3*angle)(qubits[1])])
+            tensors = get_gate_tensors(circuit, dtype, backend)
+            check_gate_tensors(circuit, tensors)
+            for tensor in tensors:
+                assert tensor_wrapper.wrap_operand(tensor).data_ptr % cirq_parser_utils._GATE_ALIGNMENT == 0
+
+
+@pytest.mark.skipif(cirq is None, reason="cirq is not installed")
+class TestCirqRemoveMeasurements:
+
+    @pytest.mark.parametrize("measure", (False, True))
+    def test_snapshot(self, measure):
+        qubits = cirq.LineQubit.range(2)
+        circuit = cirq.Circuit([cirq.H(qubits[0]), cirq.CNOT(*qubits)])
+        if measure:
+            circuit.append(cirq.measure(*qubits))
+        snapshot = cirq_parser_utils.remove_measurements(circuit)
+        assert not snapshot.has_measurements()
+        n_operations = len(list(snapshot.all_operations()))
+        # modifying the input circuit afterwards must not affect the snapshot
+        circuit.append(cirq.X(qubits[1]))
+        assert len(list(snapshot.all_operations())) == n_operations == 2